@@ -0,0 +1,79 @@
+"""
+Measures URL ingestion throughput (lines per second).
+
+    python benchmarks/bench_url_ingest.py [--lines 1000000] [--max-tracked 2000000]
+
+Generates a synthetic URL list mixing video, shorts, youtu.be, channel and
+handle URLs with duplicates, comments and invalid lines, then streams it
+through utils.url_ingest.ingest_urls.
+"""
+import argparse
+import logging
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from utils.url_ingest import IngestStats, ingest_urls  # noqa: E402
+
+ID_CHARS = string.ascii_letters + string.digits + "-_"
+
+def _random_id(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(ID_CHARS) for _ in range(length))
+
+def write_sample(path: Path, lines: int, seed: int = 42) -> None:
+    rng = random.Random(seed)
+    # A pool smaller than the line count guarantees duplicates.
+    video_ids = [_random_id(rng, 11) for _ in range(max(1, lines // 2))]
+    templates = [
+        "https://www.youtube.com/watch?v={vid}",
+        "https://youtube.com/watch?v={vid}&t=42s",
+        "https://youtu.be/{vid}",
+        "youtu.be/{vid}",
+        "https://www.youtube.com/shorts/{vid}",
+        "https://m.youtube.com/embed/{vid}",
+        "https://www.youtube.com/channel/UC{cid}",
+        "https://www.youtube.com/@handle{n}",
+        "https://example.com/not-youtube/{vid}",
+        "# comment line",
+        "",
+    ]
+    with path.open("w", encoding="utf-8") as f:
+        for _ in range(lines):
+            template = rng.choice(templates)
+            f.write(
+                template.format(
+                    vid=rng.choice(video_ids),
+                    cid=_random_id(rng, 22),
+                    n=rng.randrange(10000),
+                )
+                + "\n"
+            )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--max-tracked", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sample = Path(tmp) / "urls.txt"
+        write_sample(sample, args.lines)
+
+        stats = IngestStats()
+        start = time.perf_counter()
+        for _ in ingest_urls([str(sample)], max_tracked=args.max_tracked, stats=stats):
+            pass
+        elapsed = time.perf_counter() - start
+
+    print(stats)
+    print(f"{elapsed:.2f}s, {stats.lines / elapsed:,.0f} lines/s")
+
+if __name__ == "__main__":
+    main()
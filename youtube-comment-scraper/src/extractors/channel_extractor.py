@@ -2,7 +2,7 @@ import logging
 from typing import Any, Dict, List, Optional
 
 from utils.request_handler import RequestHandler
-from utils.parser_helpers import extract_channel_identifier
+from utils.parser_helpers import extract_channel_identifier, parse_iso8601_datetime
 
 logger = logging.getLogger(__name__)
 
@@ -107,42 +107,145 @@ def get_recent_videos_for_channel(
     """
     Uses the channel's uploads playlist to fetch recent video IDs.
     """
-    channel = get_channel_details_by_id(api_key, channel_id, request_handler)
-    if not channel:
-        logger.warning(f"Cannot fetch recent videos: no channel details for {channel_id}")
-        return []
+    discovery = discover_channel_uploads(
+        api_key=api_key,
+        channel_id=channel_id,
+        request_handler=request_handler,
+        max_videos=max_videos,
+    )
+    return [u["video_id"] for u in discovery["uploads"]]
+
+def discover_channel_uploads(
+    api_key: str,
+    channel_id: str,
+    request_handler: RequestHandler,
+    max_videos: Optional[int] = 30,
+    *,
+    uploads_playlist_id: Optional[str] = None,
+    known_video_id: Optional[str] = None,
+    known_published_at: Optional[str] = None,
+    resume: Optional[Dict[str, Any]] = None,
+    published_after: Optional[str] = None,
+    backfill: bool = False,
+) -> Dict[str, Any]:
+    """
+    Walks the channel's uploads playlist newest-first and returns:
+      {"uploads": [{"video_id", "video_published_at", "backlog"}, ...],
+       "stop_reason": "known_video" | "known_date" | "published_after" | "max_videos"
+                      | "end" | "error",
+       "skipped": bool,
+       "pages": <playlistItems requests made>}
+
+    Pagination stops as soon as it reaches `known_video_id` (the newest upload
+    seen on a previous run), an upload published before `known_published_at`
+    (that upload's date, in case it was since deleted or made private), an
+    upload published before `published_after`, or `max_videos` items. Only "max_videos" and "error" mean uploads older than
+    the last one returned may still be unseen.
+
+    `resume` ({"top_video_id", "after_video_id", "after_published_at"}) marks
+    a run of uploads already scraped by an earlier, truncated run. Those are
+    skipped without counting towards `max_videos`; uploads found below them
+    are flagged "backlog" and `skipped` is True.
+
+    In backfill mode the known video, resume point and `max_videos` are
+    ignored so the whole playlist is walked; `published_after` still applies
+    as a floor.
+    """
+    result: Dict[str, Any] = {"uploads": [], "stop_reason": "error", "skipped": False, "pages": 0}
+
+    if not uploads_playlist_id:
+        channel = get_channel_details_by_id(api_key, channel_id, request_handler)
+        if not channel:
+            logger.warning(f"Cannot fetch recent videos: no channel details for {channel_id}")
+            return result
+        uploads_playlist_id = channel.get("uploads_playlist_id")
 
-    uploads_playlist_id = channel.get("uploads_playlist_id")
     if not uploads_playlist_id:
         logger.warning(f"No uploads playlist for channel {channel_id}")
-        return []
+        return result
+
+    if backfill:
+        known_video_id = None
+        known_published_at = None
+        resume = None
+        max_videos = None
+    cutoff = parse_iso8601_datetime(published_after)
+    known_floor = parse_iso8601_datetime(known_published_at)
+
+    skip_top = resume.get("top_video_id") if resume else None
+    skip_after = resume.get("after_video_id") if resume else None
+    skip_floor = parse_iso8601_datetime(resume.get("after_published_at")) if resume else None
+    skipping = False
 
     url = f"{YOUTUBE_API_BASE}/playlistItems"
     params: Dict[str, Any] = {
         "part": "contentDetails",
         "playlistId": uploads_playlist_id,
         "maxResults": 50,
+        # Only the two fields we read; keeps deep backfills cheap to decode.
+        "fields": "nextPageToken,items/contentDetails(videoId,videoPublishedAt)",
         "key": api_key,
     }
 
-    video_ids: List[str] = []
+    uploads: List[Dict[str, Any]] = result["uploads"]
     while True:
         data = request_handler.get_json(url, params=params)
+        result["pages"] += 1
         if not data or "items" not in data:
-            break
+            return result
 
         for item in data.get("items", []):
-            vid = (
-                item.get("contentDetails", {}) or {}
-            ).get("videoId")
-            if vid:
-                video_ids.append(vid)
-                if len(video_ids) >= max_videos:
-                    return video_ids
+            details = item.get("contentDetails", {}) or {}
+            vid = details.get("videoId")
+            if not vid:
+                continue
+
+            if vid == known_video_id:
+                logger.debug(f"Reached known upload {vid} for channel {channel_id}")
+                result["stop_reason"] = "known_video"
+                return result
+
+            published_at = details.get("videoPublishedAt")
+            published = parse_iso8601_datetime(published_at)
+
+            if vid == skip_top and not result["skipped"]:
+                skipping = True
+                result["skipped"] = True
+            if skipping:
+                if vid == skip_after:
+                    skipping = False
+                    continue
+                # Fall out of the skipped run even if its last upload has
+                # since been deleted.
+                if skip_floor is None or published is None or published >= skip_floor:
+                    continue
+                skipping = False
+
+            if known_floor is not None and published is not None and published < known_floor:
+                logger.debug(f"Reached uploads older than the known upload for channel {channel_id}")
+                result["stop_reason"] = "known_date"
+                return result
+
+            if cutoff is not None and published is not None and published < cutoff:
+                logger.debug(f"Reached published_after cutoff for channel {channel_id}")
+                result["stop_reason"] = "published_after"
+                return result
+
+            uploads.append(
+                {
+                    "video_id": vid,
+                    "video_published_at": published_at,
+                    "backlog": result["skipped"],
+                }
+            )
+            if max_videos is not None and len(uploads) >= max_videos:
+                result["stop_reason"] = "max_videos"
+                return result
 
         next_token = data.get("nextPageToken")
         if not next_token:
-            break
+            result["stop_reason"] = "end"
+            return result
         params["pageToken"] = next_token
-
-    return video_ids
\ No newline at end of file
+        if backfill and result["pages"] % 20 == 0:
+            logger.info(f"Backfill of {channel_id}: {len(uploads)} uploads so far")
@@ -1,5 +1,5 @@
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Container, Dict, List, Optional
 
 from youtube_transcript_api import (
     YouTubeTranscriptApi,
@@ -7,6 +7,7 @@ from youtube_transcript_api import (
     NoTranscriptFound,
 )
 
+from utils.profiler import profile_stage
 from utils.request_handler import RequestHandler
 
 logger = logging.getLogger(__name__)
@@ -18,9 +19,14 @@ def get_video_comments(
     video_id: str,
     max_comments: int,
     request_handler: RequestHandler,
+    order: str = "relevance",
+    stop_at_comment_ids: Optional[Container[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Uses the YouTube Data API commentThreads endpoint to fetch top-level comments.
+
+    With order="time" and `stop_at_comment_ids`, pagination stops at the first
+    already-known comment, so only comments newer than it are returned.
     """
     url = f"{YOUTUBE_API_BASE}/commentThreads"
     params: Dict[str, Any] = {
@@ -28,7 +34,7 @@ def get_video_comments(
         "videoId": video_id,
         "maxResults": 100,
         "textFormat": "plainText",
-        "order": "relevance",
+        "order": order,
         "key": api_key,
     }
 
@@ -53,6 +59,9 @@ def get_video_comments(
                 item.get("snippet", {}) or {}
             ).get("topLevelComment", {}).get("snippet", {}) or {}
 
+            if stop_at_comment_ids is not None and item.get("id") in stop_at_comment_ids:
+                return comments
+
             comment = {
                 "comment_id": item.get("id"),
                 "comment_author_name": snippet.get("authorDisplayName"),
@@ -131,8 +140,9 @@ def get_captions_for_video(
         logger.exception("Failed to fetch transcript for %s: %s", video_id, exc)
         return None
 
-    full_text = " ".join((e.get("text") or "").strip() for e in entries if e.get("text"))
-    full_text = " ".join(full_text.split())  # Normalize whitespace
+    with profile_stage("get_captions_for_video.join"):
+        full_text = " ".join((e.get("text") or "").strip() for e in entries if e.get("text"))
+        full_text = " ".join(full_text.split())  # Normalize whitespace
 
     return {
         "language_code": transcript.language_code,
@@ -1,5 +1,5 @@
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from utils.request_handler import RequestHandler
 
@@ -7,6 +7,9 @@ logger = logging.getLogger(__name__)
 
 YOUTUBE_API_BASE = "https://www.googleapis.com/youtube/v3"
 
+# videos.list accepts up to 50 comma-separated IDs per request.
+MAX_IDS_PER_REQUEST = 50
+
 def get_video_details(
     api_key: str,
     video_id: str,
@@ -27,7 +30,46 @@ def get_video_details(
         logger.warning(f"No video details found for {video_id}")
         return None
 
-    item = data["items"][0]
+    return _normalize_video(data["items"][0])
+
+def get_video_details_batch(
+    api_key: str,
+    video_ids: List[str],
+    request_handler: RequestHandler,
+    failed_ids: Optional[Set[str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetches details for many videos, 50 per request, keyed by video_id.
+    Videos the API does not return (private, deleted) are omitted. IDs whose
+    request failed (e.g. quotaExceeded) are omitted too and, when given, added
+    to `failed_ids` so callers can tell them apart.
+    """
+    url = f"{YOUTUBE_API_BASE}/videos"
+    details: Dict[str, Dict[str, Any]] = {}
+
+    for start in range(0, len(video_ids), MAX_IDS_PER_REQUEST):
+        chunk = video_ids[start:start + MAX_IDS_PER_REQUEST]
+        params = {
+            "part": "snippet,statistics,contentDetails",
+            "id": ",".join(chunk),
+            "maxResults": MAX_IDS_PER_REQUEST,
+            "key": api_key,
+        }
+        data = request_handler.get_json(url, params=params)
+        if not data or "items" not in data:
+            logger.warning(f"No video details returned for {len(chunk)} videos")
+            if failed_ids is not None:
+                failed_ids.update(chunk)
+            continue
+
+        for item in data["items"]:
+            normalized = _normalize_video(item)
+            details[normalized["video_id"]] = normalized
+
+    return details
+
+def _normalize_video(item: Dict[str, Any]) -> Dict[str, Any]:
+    video_id = item.get("id")
     snippet = item.get("snippet", {}) or {}
     statistics = item.get("statistics", {}) or {}
     content_details = item.get("contentDetails", {}) or {}
@@ -1,34 +1,34 @@
+import argparse
 import json
 import logging
+import math
 import sys
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
 
 from extractors.channel_extractor import (
     get_channel_details_from_url,
     get_channel_details_by_id,
-    get_recent_videos_for_channel,
+    discover_channel_uploads,
 )
-from extractors.video_extractor import get_video_details
+from extractors.video_extractor import get_video_details, get_video_details_batch
 from extractors.comment_extractor import get_video_comments, get_captions_for_video
-from utils.parser_helpers import (
-    extract_video_id,
-    is_video_url,
-    is_channel_url,
-)
 from utils.request_handler import RequestHandler
+from utils.channel_state import advance_bookmark, load_channel_state, save_channel_state
+from utils.scheduler import VideoScheduler
+from utils.settings import load_settings, resolve_project_path
+from utils.url_ingest import IngestStats, ingest_urls
+from utils.profiler import (
+    mark_video_boundary,
+    profile_stage,
+    start_profiling,
+    stop_profiling,
+)
+from storage.sqlite_storage import SqliteStorage
+from storage.search_index import SearchIndex
+from storage.jsonl_storage import JsonLinesStorage
 
-PROJECT_ROOT = Path(__file__).resolve().parents[1]
-
-def load_settings() -> Dict[str, Any]:
-    settings_path = PROJECT_ROOT / "src" / "config" / "settings.json"
-    if not settings_path.exists():
-        raise FileNotFoundError(f"settings.json not found at {settings_path}")
-
-    with settings_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    return data
+# Called with each video's records as soon as process_video produces them.
+RecordCallback = Callable[[List[Dict[str, Any]]], None]
 
 def setup_logging(log_level: str = "INFO") -> None:
     level = getattr(logging, log_level.upper(), logging.INFO)
@@ -38,20 +38,32 @@ def setup_logging(log_level: str = "INFO") -> None:
         handlers=[logging.StreamHandler(sys.stdout)],
     )
 
-def load_input_urls() -> List[str]:
-    input_path = PROJECT_ROOT / "data" / "input_urls.txt"
-    if not input_path.exists():
-        logging.warning("input_urls.txt not found; no URLs to process.")
-        return []
-
-    urls: List[str] = []
-    with input_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            stripped = line.strip()
-            if not stripped or stripped.startswith("#"):
-                continue
-            urls.append(stripped)
-    return urls
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scrape YouTube comments, videos and channels.")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="URL list files, glob patterns, or - for stdin. "
+        "Defaults to input_sources from settings.json.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile each pipeline stage and write pstats, collapsed stacks and "
+        "a text report next to output_file.",
+    )
+    return parser.parse_args(argv)
+
+def resolve_input_sources(settings: Dict[str, Any], inputs: List[str]) -> List[str]:
+    """
+    Returns the URL sources to read: command-line inputs if given, else
+    `input_sources` from settings with relative paths anchored at the
+    project root.
+    """
+    if inputs:
+        return inputs
+    sources = settings.get("input_sources") or ["data/input_urls.txt"]
+    return [src if src == "-" else str(resolve_project_path(src)) for src in sources]
 
 def build_record(
     channel: Dict[str, Any],
@@ -106,11 +118,20 @@ def process_video(
     video_id: str,
     request_handler: RequestHandler,
     settings: Dict[str, Any],
+    on_records: Optional[RecordCallback] = None,
+    video_details: Optional[Dict[str, Any]] = None,
+    channel_details: Optional[Dict[str, Any]] = None,
 ) -> List[Dict[str, Any]]:
+    """
+    Scrapes one video. Callers that already hold the video or channel details
+    can pass them in to skip the corresponding API requests.
+    """
     logger = logging.getLogger("main.process_video")
     records: List[Dict[str, Any]] = []
 
-    video_details = get_video_details(api_key, video_id, request_handler)
+    if video_details is None:
+        with profile_stage("get_video_details"):
+            video_details = get_video_details(api_key, video_id, request_handler)
     if not video_details:
         logger.warning(f"Skipping video {video_id}: could not fetch details.")
         return records
@@ -120,7 +141,9 @@ def process_video(
         logger.warning(f"Video {video_id} has no channel_id in details; skipping.")
         return records
 
-    channel_details = get_channel_details_by_id(api_key, channel_id, request_handler)
+    if channel_details is None or channel_details.get("channel_id") != channel_id:
+        with profile_stage("get_channel_details_by_id"):
+            channel_details = get_channel_details_by_id(api_key, channel_id, request_handler)
     if not channel_details:
         logger.warning(f"Skipping video {video_id}: could not fetch channel details.")
         return records
@@ -131,26 +154,33 @@ def process_video(
     caption_info: Optional[Dict[str, Any]] = None
 
     if fetch_captions:
-        caption_info = get_captions_for_video(
+        with profile_stage("get_captions_for_video"):
+            caption_info = get_captions_for_video(
+                video_id=video_id,
+                preferred_languages=caption_languages,
+            )
+
+    with profile_stage("get_video_comments"):
+        comments = get_video_comments(
+            api_key=api_key,
             video_id=video_id,
-            preferred_languages=caption_languages,
+            max_comments=comment_limit,
+            request_handler=request_handler,
         )
 
-    comments = get_video_comments(
-        api_key=api_key,
-        video_id=video_id,
-        max_comments=comment_limit,
-        request_handler=request_handler,
-    )
-
-    if not comments:
-        # Still emit at least one record with video and channel metadata.
-        records.append(build_record(channel_details, video_details, None, caption_info))
-        return records
+    with profile_stage("build_record"):
+        if not comments:
+            # Still emit at least one record with video and channel metadata.
+            records.append(build_record(channel_details, video_details, None, caption_info))
+        else:
+            for c in comments:
+                records.append(build_record(channel_details, video_details, c, caption_info))
 
-    for c in comments:
-        records.append(build_record(channel_details, video_details, c, caption_info))
+    if on_records is not None:
+        with profile_stage("record_sinks"):
+            on_records(records)
 
+    mark_video_boundary(video_id)
     return records
 
 def handle_channel_url(
@@ -158,62 +188,270 @@ def handle_channel_url(
     url: str,
     request_handler: RequestHandler,
     settings: Dict[str, Any],
+    on_records: Optional[RecordCallback] = None,
+    channel_state: Optional[Dict[str, Dict[str, Any]]] = None,
+    scheduler: Optional[VideoScheduler] = None,
 ) -> List[Dict[str, Any]]:
+    """
+    Scrapes the channel's recent uploads. When `channel_state` is given, only
+    uploads not scraped by earlier runs are fetched and the channel's
+    bookmark is advanced past those processed now. When `scheduler` is
+    given, uploads are reordered and trimmed to fit its budget.
+    """
     logger = logging.getLogger("main.handle_channel_url")
     logger.info(f"Processing channel URL: {url}")
     all_records: List[Dict[str, Any]] = []
 
+    if scheduler is not None and scheduler.exhausted:
+        logger.warning(f"Skipping channel {url}: scheduler budget is used up.")
+        return all_records
+
     channel_details = get_channel_details_from_url(api_key, url, request_handler)
     if not channel_details:
         logger.warning(f"Skipping channel {url}: could not fetch details.")
         return all_records
 
+    channel_id = channel_details["channel_id"]
+    bookmark = (channel_state or {}).get(channel_id) or {}
     max_videos = int(settings.get("max_videos_per_channel", 30))
-    video_ids = get_recent_videos_for_channel(
-        api_key=api_key,
-        channel_id=channel_details["channel_id"],
-        request_handler=request_handler,
-        max_videos=max_videos,
-    )
+    with profile_stage("discover_channel_uploads"):
+        discovery = discover_channel_uploads(
+            api_key=api_key,
+            channel_id=channel_id,
+            request_handler=request_handler,
+            max_videos=max_videos,
+            uploads_playlist_id=channel_details.get("uploads_playlist_id"),
+            known_video_id=bookmark.get("newest_video_id"),
+            known_published_at=bookmark.get("newest_published_at"),
+            resume=bookmark.get("resume"),
+            published_after=settings.get("published_after"),
+            backfill=bool(settings.get("channel_backfill", False)),
+        )
+    uploads = discovery["uploads"]
 
-    if not video_ids:
-        logger.info(f"No recent videos found for channel {channel_details['channel_id']}.")
-        return all_records
+    if not uploads:
+        logger.info(f"No new videos found for channel {channel_id}.")
+    else:
+        logger.info(f"Found {len(uploads)} new videos for channel {channel_id}.")
 
-    for vid in video_ids:
-        records = process_video(api_key, vid, request_handler, settings)
+    upload_ids = [u["video_id"] for u in uploads]
+    failed_ids: Set[str] = set()
+    with profile_stage("get_video_details_batch"):
+        details_by_id = get_video_details_batch(
+            api_key, upload_ids, request_handler, failed_ids=failed_ids
+        )
+    videos = [details_by_id[vid] for vid in upload_ids if vid in details_by_id]
+    if scheduler is not None:
+        # channels.list for the URL, the playlistItems pages and the
+        # videos.list batches have all been spent by now.
+        scheduler.charge(1 + discovery["pages"] + math.ceil(len(upload_ids) / 50))
+        videos = scheduler.plan(videos)
+
+    processed = set()
+    for video in videos:
+        records = process_video(
+            api_key,
+            video["video_id"],
+            request_handler,
+            settings,
+            on_records,
+            video_details=video,
+            channel_details=channel_details,
+        )
         all_records.extend(records)
+        processed.add(video["video_id"])
+
+    if channel_state is not None:
+        # Uploads the scheduler left out or whose details request failed stay
+        # pending and are rediscovered next run. Only uploads a successful
+        # videos.list response left out (private, deleted) count as done.
+        pending = {
+            vid
+            for vid in upload_ids
+            if vid not in processed and (vid in details_by_id or vid in failed_ids)
+        }
+        channel_state[channel_id] = advance_bookmark(bookmark, discovery, pending)
 
     return all_records
 
-def handle_video_url(
+def handle_video(
     api_key: str,
-    url: str,
+    video_id: str,
     request_handler: RequestHandler,
     settings: Dict[str, Any],
+    on_records: Optional[RecordCallback] = None,
+    scheduler: Optional[VideoScheduler] = None,
 ) -> List[Dict[str, Any]]:
-    logger = logging.getLogger("main.handle_video_url")
-    logger.info(f"Processing video URL: {url}")
-    video_id = extract_video_id(url)
-    if not video_id:
-        logger.warning(f"Could not extract video ID from URL: {url}")
-        return []
-    return process_video(api_key, video_id, request_handler, settings)
+    """
+    Scrapes a single video whose ID was already extracted by classify_url.
+    With a `scheduler`, its lookups are charged to the run's budget and the
+    video is skipped, before any request, once the budget cannot cover it.
+    """
+    logger = logging.getLogger("main.handle_video")
+    logger.info(f"Processing video: {video_id}")
+
+    video_details = None
+    channel_details = None
+    if scheduler is not None:
+        # videos.list, channels.list and at least one commentThreads page.
+        if not scheduler.can_afford(3):
+            logger.warning(f"Skipping video {video_id}: scheduler budget is used up.")
+            return []
+        with profile_stage("get_video_details"):
+            video_details = get_video_details(api_key, video_id, request_handler)
+        scheduler.charge(1)
+        if not video_details:
+            logger.warning(f"Skipping video {video_id}: could not fetch details.")
+            return []
+
+        channel_id = video_details.get("channel_id")
+        if not scheduler.plan([video_details], extra_quota_per_video=1 if channel_id else 0):
+            logger.warning(f"Skipping video {video_id}: over the scheduler budget.")
+            return []
+        if channel_id:
+            # Fetched here rather than in process_video so the lookup planned
+            # above is the one made.
+            with profile_stage("get_channel_details_by_id"):
+                channel_details = get_channel_details_by_id(api_key, channel_id, request_handler)
+            if not channel_details:
+                logger.warning(f"Skipping video {video_id}: could not fetch channel details.")
+                return []
+
+    return process_video(
+        api_key,
+        video_id,
+        request_handler,
+        settings,
+        on_records,
+        video_details=video_details,
+        channel_details=channel_details,
+    )
 
 def write_output(records: List[Dict[str, Any]], settings: Dict[str, Any]) -> None:
-    output_path = settings.get("output_file", "data/sample_output.json")
-    output_path = Path(output_path)
-    if not output_path.is_absolute():
-        output_path = PROJECT_ROOT / output_path
+    output_path = resolve_project_path(settings.get("output_file", "data/sample_output.json"))
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with output_path.open("w", encoding="utf-8") as f:
+    with profile_stage("write_output"), output_path.open("w", encoding="utf-8") as f:
         json.dump(records, f, ensure_ascii=False, indent=2)
 
     logging.getLogger("main").info(f"Wrote {len(records)} records to {output_path}")
 
+def write_profile_reports(settings: Dict[str, Any]) -> None:
+    """
+    Stops the active profiler and writes its reports next to output_file,
+    e.g. data/sample_output.profile.pstats.
+    """
+    profiler = stop_profiling()
+    if profiler is None:
+        return
+
+    output_path = resolve_project_path(settings.get("output_file", "data/sample_output.json"))
+    paths = profiler.write_reports(output_path.with_suffix(".profile"))
+
+    logger = logging.getLogger("main")
+    logger.info("Profile by stage:\n%s", profiler.report())
+    logger.info(f"Wrote profile to {', '.join(str(p) for p in paths)}")
+
+def open_record_sinks(settings: Dict[str, Any]) -> List[Any]:
+    """
+    Opens the streaming sinks enabled in `storage_backends`. Each sink exposes
+    write_records(records) and close(), and is fed one video at a time.
+    """
+    backends = settings.get("storage_backends") or ["json"]
+    sinks: List[Any] = []
+
+    if "sqlite" in backends:
+        db_path = resolve_project_path(settings.get("sqlite_file", "data/youtube_comments.db"))
+        batch_size = int(settings.get("sqlite_batch_size", 5000))
+        sinks.append(SqliteStorage(db_path, batch_size=batch_size))
+        logging.getLogger("main").info(f"Upserting records into {db_path}")
+
+    if "jsonl" in backends:
+        jsonl_path = resolve_project_path(settings.get("jsonl_file", "data/comments.jsonl"))
+        sinks.append(JsonLinesStorage(jsonl_path))
+        logging.getLogger("main").info(f"Appending records to {jsonl_path}")
+
+    if "search" in backends:
+        index_path = resolve_project_path(
+            settings.get("search_index_file", "data/search_index.db")
+        )
+        sinks.append(SearchIndex(index_path))
+        logging.getLogger("main").info(f"Indexing comments and captions into {index_path}")
+
+    return sinks
+
+def scrape_inputs(api_key: str, settings: Dict[str, Any], sources: List[str]) -> None:
+    """
+    Scrapes every URL in `sources` into the enabled storage backends.
+    """
+    logger = logging.getLogger("main")
+    ingest_stats = IngestStats()
+    request_handler = RequestHandler()
+    sinks = open_record_sinks(settings)
+
+    channel_state: Optional[Dict[str, Dict[str, Any]]] = None
+    state_path = resolve_project_path(
+        settings.get("channel_state_file", "data/channel_state.json")
+    )
+    if settings.get("incremental_channel_refresh", False):
+        channel_state = load_channel_state(state_path)
+
+    storage = next((s for s in sinks if isinstance(s, SqliteStorage)), None)
+    scheduler = VideoScheduler(
+        settings,
+        sampled_counts=storage.comment_counts if storage is not None else None,
+    )
+
+    def on_records(records: List[Dict[str, Any]]) -> None:
+        for sink in sinks:
+            sink.write_records(records)
+
+    # Only the json backend needs every record at the end; the streaming
+    # sinks already got them one video at a time.
+    keep_records = "json" in (settings.get("storage_backends") or ["json"])
+    all_records: List[Dict[str, Any]] = []
+    record_count = 0
+
+    try:
+        for item in ingest_urls(sources, stats=ingest_stats):
+            try:
+                if item.kind == "video":
+                    records = handle_video(
+                        api_key, item.id, request_handler, settings, on_records, scheduler
+                    )
+                else:
+                    records = handle_channel_url(
+                        api_key,
+                        item.url,
+                        request_handler,
+                        settings,
+                        on_records,
+                        channel_state,
+                        scheduler,
+                    )
+                record_count += len(records)
+                if keep_records:
+                    all_records.extend(records)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception(f"Failed to process URL {item.url}: {exc}")
+    finally:
+        for sink in sinks:
+            sink.close()
+        if channel_state is not None:
+            save_channel_state(state_path, channel_state)
+
+    if not ingest_stats.accepted:
+        logger.error(f"No valid input URLs found in {', '.join(sources)}. Nothing to do.")
+        sys.exit(1)
+
+    if not record_count:
+        logger.warning("No records produced. Check logs for errors.")
+    elif keep_records:
+        write_output(all_records, settings)
+
 def main() -> None:
+    args = parse_args()
     settings = load_settings()
     setup_logging(settings.get("log_level", "INFO"))
     logger = logging.getLogger("main")
@@ -225,32 +463,16 @@ def main() -> None:
         )
         sys.exit(1)
 
-    urls = load_input_urls()
-    if not urls:
-        logger.error("No input URLs found in data/input_urls.txt. Nothing to do.")
-        sys.exit(1)
-
-    request_handler = RequestHandler()
-
-    all_records: List[Dict[str, Any]] = []
+    sources = resolve_input_sources(settings, args.inputs)
 
-    for url in urls:
-        try:
-            if is_channel_url(url):
-                records = handle_channel_url(api_key, url, request_handler, settings)
-            elif is_video_url(url):
-                records = handle_video_url(api_key, url, request_handler, settings)
-            else:
-                logger.warning(f"Unrecognized URL type, skipping: {url}")
-                records = []
-            all_records.extend(records)
-        except Exception as exc:  # noqa: BLE001
-            logger.exception(f"Failed to process URL {url}: {exc}")
-
-    if not all_records:
-        logger.warning("No records produced. Check logs for errors.")
-    else:
-        write_output(all_records, settings)
+    if args.profile:
+        start_profiling()
+    try:
+        scrape_inputs(api_key, settings, sources)
+    finally:
+        # Also reached on sys.exit and uncaught errors, so a failed run
+        # still leaves its profile behind.
+        write_profile_reports(settings)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+import argparse
+import sqlite3
+import sys
+
+from storage.search_index import DOC_KINDS, SearchIndex, build_match_query
+from utils.settings import load_settings, resolve_project_path
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Search scraped comments and captions in the local index."
+    )
+    parser.add_argument("query", help="Words to search for.")
+    parser.add_argument("--phrase", action="store_true", help="Match the words as an exact phrase.")
+    parser.add_argument("--prefix", action="store_true", help="Treat the last word as a prefix.")
+    parser.add_argument("--raw", action="store_true", help="Pass the query to FTS5 MATCH unchanged.")
+    parser.add_argument("--kind", choices=DOC_KINDS)
+    parser.add_argument("--channel", dest="channel_id")
+    parser.add_argument("--video", dest="video_id")
+    parser.add_argument("--since", help="ISO date, e.g. 2025-01-01")
+    parser.add_argument("--until", help="ISO date (exclusive)")
+    parser.add_argument("--limit", type=int, default=20)
+    return parser.parse_args()
+
+def main() -> None:
+    args = parse_args()
+    settings = load_settings()
+    index_path = resolve_project_path(settings.get("search_index_file", "data/search_index.db"))
+    if not index_path.exists():
+        print(f"No search index at {index_path}; add \"search\" to storage_backends and run main.py.")
+        sys.exit(1)
+
+    if args.raw:
+        query = args.query
+    else:
+        query = build_match_query(args.query, phrase=args.phrase, prefix=args.prefix)
+
+    with SearchIndex(index_path) as index:
+        try:
+            hits = index.search(
+                query,
+                kind=args.kind,
+                channel_id=args.channel_id,
+                video_id=args.video_id,
+                since=args.since,
+                until=args.until,
+                limit=args.limit,
+            )
+        except sqlite3.OperationalError as exc:
+            print(f"Invalid FTS5 query {query!r}: {exc}")
+            sys.exit(2)
+
+    for hit in hits:
+        print(f"{hit['doc_date'] or '-'}  {hit['kind']:<7}  {hit['video_id']}  {hit['item_id']}")
+        print(f"    {hit['snippet']}")
+
+if __name__ == "__main__":
+    main()
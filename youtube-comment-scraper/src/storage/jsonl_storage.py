@@ -0,0 +1,35 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Union
+
+logger = logging.getLogger(__name__)
+
+class JsonLinesStorage:
+    """
+    Appends records to a JSON Lines file, one record per line. Unlike the
+    JSON array written by write_output, it can grow across runs.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = self.path.open("a", encoding="utf-8")
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "JsonLinesStorage":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def write_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for record in records:
+            self.file.write(json.dumps(record, ensure_ascii=False))
+            self.file.write("\n")
+            count += 1
+        self.file.flush()
+        return count
@@ -0,0 +1,200 @@
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# search_docs holds one row per comment or caption track; search_fts is an
+# external-content FTS5 table over its body, kept in sync by triggers so
+# upserts only re-tokenize documents whose text actually changed.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    doc_id INTEGER PRIMARY KEY,
+    doc_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    channel_id TEXT,
+    video_id TEXT,
+    doc_date TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_docs_channel ON search_docs (channel_id, doc_date);
+CREATE INDEX IF NOT EXISTS idx_search_docs_date ON search_docs (doc_date);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    body,
+    content='search_docs',
+    content_rowid='doc_id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS search_docs_ai AFTER INSERT ON search_docs BEGIN
+    INSERT INTO search_fts (rowid, body) VALUES (new.doc_id, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS search_docs_ad AFTER DELETE ON search_docs BEGIN
+    INSERT INTO search_fts (search_fts, rowid, body) VALUES ('delete', old.doc_id, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS search_docs_au AFTER UPDATE OF body ON search_docs
+WHEN old.body IS NOT new.body BEGIN
+    INSERT INTO search_fts (search_fts, rowid, body) VALUES ('delete', old.doc_id, old.body);
+    INSERT INTO search_fts (rowid, body) VALUES (new.doc_id, new.body);
+END;
+"""
+
+UPSERT_DOC = """
+INSERT INTO search_docs (doc_key, kind, channel_id, video_id, doc_date, body)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (doc_key) DO UPDATE SET
+    channel_id = excluded.channel_id,
+    video_id = excluded.video_id,
+    doc_date = excluded.doc_date,
+    body = excluded.body
+"""
+
+DOC_KINDS = ("comment", "caption")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def build_match_query(text: str, *, phrase: bool = False, prefix: bool = False) -> str:
+    """
+    Turns free text into a safe FTS5 MATCH expression.
+
+    With phrase=True the words must appear adjacent and in order; otherwise
+    all words must appear anywhere. With prefix=True the last word matches
+    as a prefix (e.g. "machine lea" finds "machine learning").
+    """
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return ""
+
+    quoted = [f'"{t}"' for t in tokens]
+    if prefix:
+        quoted[-1] += " *"
+
+    if phrase:
+        # "a" + "b" is FTS5's phrase syntax that also allows a trailing prefix.
+        return " + ".join(quoted)
+    return " AND ".join(quoted)
+
+class SearchIndex:
+    """
+    Incrementally updated full-text index over comment_text and caption_text.
+    """
+
+    def __init__(self, db_path: Union[str, Path]) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.db_path), isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def write_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Adds or refreshes the comment and caption documents found in records
+        and returns the number of documents upserted.
+        """
+        docs: Dict[str, Tuple[Any, ...]] = {}
+        for record in records:
+            channel_id = record.get("channel_id")
+            video_id = record.get("video_id")
+
+            caption_text = record.get("caption_text")
+            if video_id and caption_text:
+                key = f"caption:{video_id}"
+                docs[key] = (
+                    key, "caption", channel_id, video_id,
+                    record.get("video_date"), caption_text,
+                )
+
+            comment_id = record.get("comment_id")
+            comment_text = record.get("comment_text")
+            if comment_id and comment_text:
+                key = f"comment:{comment_id}"
+                docs[key] = (
+                    key, "comment", channel_id, video_id,
+                    record.get("comment_date"), comment_text,
+                )
+
+        if not docs:
+            return 0
+
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(UPSERT_DOC, docs.values())
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        logger.debug("Indexed %s documents into %s", len(docs), self.db_path)
+        return len(docs)
+
+    def search(
+        self,
+        query: str,
+        *,
+        kind: Optional[str] = None,
+        channel_id: Optional[str] = None,
+        video_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs an FTS5 MATCH query (see build_match_query) and returns the best
+        matches ranked by bm25. Dates are ISO 8601 strings compared against
+        comment_date for comments and video_date for captions.
+        """
+        if kind is not None and kind not in DOC_KINDS:
+            raise ValueError(f"kind must be one of {DOC_KINDS}, got {kind!r}")
+        if not query:
+            return []
+
+        sql = [
+            """
+            SELECT d.kind, d.channel_id, d.video_id, d.doc_date,
+                   substr(d.doc_key, instr(d.doc_key, ':') + 1) AS item_id,
+                   snippet(search_fts, 0, '[', ']', '...', 16) AS snippet,
+                   bm25(search_fts) AS score
+            FROM search_fts
+            JOIN search_docs AS d ON d.doc_id = search_fts.rowid
+            WHERE search_fts MATCH ?
+            """
+        ]
+        params: List[Any] = [query]
+
+        if kind:
+            sql.append("AND d.kind = ?")
+            params.append(kind)
+        if channel_id:
+            sql.append("AND d.channel_id = ?")
+            params.append(channel_id)
+        if video_id:
+            sql.append("AND d.video_id = ?")
+            params.append(video_id)
+        if since:
+            sql.append("AND d.doc_date >= ?")
+            params.append(since)
+        if until:
+            sql.append("AND d.doc_date < ?")
+            params.append(until)
+
+        sql.append("ORDER BY score LIMIT ?")
+        params.append(limit)
+
+        rows = self.conn.execute("\n".join(sql), params).fetchall()
+        return [dict(row) for row in rows]
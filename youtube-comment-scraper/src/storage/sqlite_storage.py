@@ -0,0 +1,332 @@
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id TEXT PRIMARY KEY,
+    channel_url TEXT,
+    channel_name TEXT,
+    channel_description TEXT,
+    channel_location TEXT,
+    channel_views INTEGER,
+    channel_subscribers INTEGER,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    channel_id TEXT,
+    video_title TEXT,
+    video_url TEXT,
+    video_duration INTEGER,
+    video_views INTEGER,
+    video_likes INTEGER,
+    video_comments INTEGER,
+    video_date TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_videos_channel_id ON videos (channel_id, video_date);
+
+CREATE TABLE IF NOT EXISTS comments (
+    comment_id TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    channel_id TEXT,
+    comment_author_name TEXT,
+    comment_text TEXT,
+    comment_date TEXT,
+    comment_likes INTEGER,
+    comment_replies INTEGER,
+    first_seen_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_comments_video_id ON comments (video_id, comment_date);
+CREATE INDEX IF NOT EXISTS idx_comments_channel_id ON comments (channel_id, comment_date);
+CREATE INDEX IF NOT EXISTS idx_comments_comment_date ON comments (comment_date);
+
+CREATE TABLE IF NOT EXISTS captions (
+    video_id TEXT PRIMARY KEY,
+    caption_languageCode TEXT,
+    caption_languageName TEXT,
+    caption_text TEXT,
+    updated_at TEXT NOT NULL
+);
+"""
+
+UPSERT_CHANNEL = """
+INSERT INTO channels (
+    channel_id, channel_url, channel_name, channel_description,
+    channel_location, channel_views, channel_subscribers, updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (channel_id) DO UPDATE SET
+    channel_url = excluded.channel_url,
+    channel_name = excluded.channel_name,
+    channel_description = excluded.channel_description,
+    channel_location = excluded.channel_location,
+    channel_views = excluded.channel_views,
+    channel_subscribers = excluded.channel_subscribers,
+    updated_at = excluded.updated_at
+"""
+
+UPSERT_VIDEO = """
+INSERT INTO videos (
+    video_id, channel_id, video_title, video_url, video_duration,
+    video_views, video_likes, video_comments, video_date, updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (video_id) DO UPDATE SET
+    channel_id = excluded.channel_id,
+    video_title = excluded.video_title,
+    video_url = excluded.video_url,
+    video_duration = excluded.video_duration,
+    video_views = excluded.video_views,
+    video_likes = excluded.video_likes,
+    video_comments = excluded.video_comments,
+    video_date = excluded.video_date,
+    updated_at = excluded.updated_at
+"""
+
+# Comment text can be edited, and likes/replies keep moving after the first
+# scrape, so those are refreshed in place; first_seen_at is kept as-is.
+UPSERT_COMMENT = """
+INSERT INTO comments (
+    comment_id, video_id, channel_id, comment_author_name, comment_text,
+    comment_date, comment_likes, comment_replies, first_seen_at, updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (comment_id) DO UPDATE SET
+    comment_author_name = excluded.comment_author_name,
+    comment_text = excluded.comment_text,
+    comment_likes = excluded.comment_likes,
+    comment_replies = excluded.comment_replies,
+    updated_at = excluded.updated_at
+"""
+
+UPSERT_CAPTION = """
+INSERT INTO captions (
+    video_id, caption_languageCode, caption_languageName, caption_text, updated_at
+) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (video_id) DO UPDATE SET
+    caption_languageCode = excluded.caption_languageCode,
+    caption_languageName = excluded.caption_languageName,
+    caption_text = excluded.caption_text,
+    updated_at = excluded.updated_at
+"""
+
+class SqliteStorage:
+    """
+    SQLite archive for scraped records.
+
+    Flat output records are split into channels, videos, comments and
+    captions tables and upserted, so re-scraping a video refreshes like and
+    reply counts in place instead of appending duplicate rows.
+    """
+
+    def __init__(self, db_path: Union[str, Path], batch_size: int = 5000) -> None:
+        self.db_path = Path(db_path)
+        self.batch_size = max(1, int(batch_size))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Transactions are managed explicitly in flush().
+        self.conn = sqlite3.connect(str(self.db_path), isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        # Rows waiting for the next flush, keyed so a row seen twice in one
+        # batch is only upserted once.
+        self._channels: Dict[str, Tuple[Any, ...]] = {}
+        self._videos: Dict[str, Tuple[Any, ...]] = {}
+        self._captions: Dict[str, Tuple[Any, ...]] = {}
+        self._comments: Dict[str, Tuple[Any, ...]] = {}
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+
+    def __enter__(self) -> "SqliteStorage":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def write_records(
+        self,
+        records: Iterable[Dict[str, Any]],
+        comments_only: bool = False,
+    ) -> int:
+        """
+        Buffers records for upserting and returns the number of comment rows
+        accepted. Buffered rows are committed in one transaction once
+        `batch_size` comments are pending, and on flush() or close().
+
+        With `comments_only`, the channel, video and caption fields of the
+        records are ignored, for callers whose copies of those may be older
+        than what is already stored.
+        """
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        comment_count = 0
+
+        for record in records:
+            channel_id = record.get("channel_id")
+            video_id = record.get("video_id")
+
+            if channel_id and not comments_only:
+                self._channels[channel_id] = (
+                    channel_id,
+                    record.get("channel_url"),
+                    record.get("channel_name"),
+                    record.get("channel_description"),
+                    record.get("channel_location"),
+                    record.get("channel_views"),
+                    record.get("channel_subscribers"),
+                    now,
+                )
+
+            if not video_id:
+                continue
+
+            if not comments_only:
+                self._videos[video_id] = (
+                    video_id,
+                    channel_id,
+                    record.get("video_title"),
+                    record.get("video_url"),
+                    record.get("video_duration"),
+                    record.get("video_views"),
+                    record.get("video_likes"),
+                    record.get("video_comments"),
+                    record.get("video_date"),
+                    now,
+                )
+
+                if record.get("caption_text") is not None:
+                    self._captions[video_id] = (
+                        video_id,
+                        record.get("caption_languageCode"),
+                        record.get("caption_languageName"),
+                        record.get("caption_text"),
+                        now,
+                    )
+
+            comment_id = record.get("comment_id")
+            if comment_id:
+                self._comments[comment_id] = (
+                    comment_id,
+                    video_id,
+                    channel_id,
+                    record.get("comment_author_name"),
+                    record.get("comment_text"),
+                    record.get("comment_date"),
+                    record.get("comment_likes"),
+                    record.get("comment_replies"),
+                    now,
+                    now,
+                )
+                comment_count += 1
+
+        if len(self._comments) >= self.batch_size:
+            self.flush()
+        return comment_count
+
+    def flush(self) -> None:
+        """
+        Upserts all buffered rows in a single transaction.
+        """
+        if not (self._channels or self._videos or self._captions or self._comments):
+            return
+
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(UPSERT_COMMENT, self._comments.values())
+            self.conn.executemany(UPSERT_CHANNEL, self._channels.values())
+            self.conn.executemany(UPSERT_VIDEO, self._videos.values())
+            self.conn.executemany(UPSERT_CAPTION, self._captions.values())
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        logger.debug(
+            "Upserted %s channels, %s videos, %s comments into %s",
+            len(self._channels),
+            len(self._videos),
+            len(self._comments),
+            self.db_path,
+        )
+        self._channels.clear()
+        self._videos.clear()
+        self._captions.clear()
+        self._comments.clear()
+
+    def latest_comments_for_channel(
+        self,
+        channel_id: str,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the most recent comments across all videos of a channel.
+        """
+        self.flush()
+        rows = self.conn.execute(
+            """
+            SELECT c.*, v.video_title
+            FROM comments AS c
+            LEFT JOIN videos AS v ON v.video_id = c.video_id
+            WHERE c.channel_id = ?
+            ORDER BY c.comment_date DESC
+            LIMIT ?
+            """,
+            (channel_id, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_comments_for_video(
+        self,
+        video_id: str,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        self.flush()
+        rows = self.conn.execute(
+            """
+            SELECT * FROM comments
+            WHERE video_id = ?
+            ORDER BY comment_date DESC
+            LIMIT ?
+            """,
+            (video_id, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_video(self, video_id: str) -> Optional[Dict[str, Any]]:
+        self.flush()
+        row = self.conn.execute(
+            "SELECT * FROM videos WHERE video_id = ?", (video_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def comment_counts(self, video_ids: List[str]) -> Dict[str, int]:
+        """
+        Returns how many comments are already archived for each video.
+        """
+        self.flush()
+        counts: Dict[str, int] = {}
+        # Stay well under SQLite's bound-parameter limit.
+        for start in range(0, len(video_ids), 500):
+            chunk = video_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"""
+                SELECT video_id, COUNT(*) AS n FROM comments
+                WHERE video_id IN ({placeholders})
+                GROUP BY video_id
+                """,
+                chunk,
+            ).fetchall()
+            counts.update({row["video_id"]: row["n"] for row in rows})
+        return counts
@@ -0,0 +1,99 @@
+import json
+import logging
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def load_channel_state(path: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Loads the per-channel upload bookmarks, keyed by channel_id:
+      {"newest_video_id": ..., "newest_published_at": ..., "last_checked_at": ...,
+       "resume": {...}}  (see advance_bookmark)
+    """
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as exc:
+        logger.warning("Ignoring unreadable state file %s: %s", path, exc)
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def save_channel_state(path: Path, state: Dict[str, Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a sibling file first so an interrupted run can't truncate it.
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+    tmp_path.replace(path)
+
+def advance_bookmark(
+    bookmark: Dict[str, Any],
+    discovery: Dict[str, Any],
+    pending_ids: Collection[str] = (),
+) -> Dict[str, Any]:
+    """
+    Returns the channel bookmark after a discover_channel_uploads() walk whose
+    uploads were scraped except for `pending_ids`.
+
+    "newest_video_id" only ever moves to an upload when every upload below
+    it, down to the previous bookmark, has been scraped. When the walk was cut
+    short (max_videos or a failed request) or uploads were left pending, the
+    scraped run at the top of the playlist is saved as "resume" so the next
+    walk skips it and continues with the older uploads instead of losing them.
+    """
+    # The walk newest-first as (video_id, published_at, done), with the run
+    # skipped via the previous resume point standing in as two done entries.
+    previous = bookmark.get("resume") or {}
+    walked: List[Tuple[str, Optional[str], bool]] = []
+    skipped_added = False
+    for upload in discovery["uploads"]:
+        if upload.get("backlog") and not skipped_added:
+            walked += _skipped_entries(previous)
+            skipped_added = True
+        walked.append(
+            (upload["video_id"], upload["video_published_at"], upload["video_id"] not in pending_ids)
+        )
+    if discovery.get("skipped") and not skipped_added:
+        walked += _skipped_entries(previous)
+
+    updated = dict(bookmark)
+    updated.pop("resume", None)
+
+    # Only a walk that reached the old bookmark (or its publish date), the
+    # cutoff or the end of the playlist proves nothing older is missing. A
+    # channel's first walk has no older bound to reach; it is only meant to
+    # pick up the newest uploads.
+    undone_end = len(walked)
+    first_walk = not bookmark.get("newest_video_id") and discovery["stop_reason"] == "max_videos"
+    if first_walk or discovery["stop_reason"] in (
+        "known_video", "known_date", "published_after", "end"
+    ):
+        while undone_end > 0 and walked[undone_end - 1][2]:
+            undone_end -= 1
+        if undone_end < len(walked):
+            updated["newest_video_id"] = walked[undone_end][0]
+            updated["newest_published_at"] = walked[undone_end][1]
+
+    done_prefix = 0
+    while done_prefix < undone_end and walked[done_prefix][2]:
+        done_prefix += 1
+    if done_prefix > 0:
+        updated["resume"] = {
+            "top_video_id": walked[0][0],
+            "top_published_at": walked[0][1],
+            "after_video_id": walked[done_prefix - 1][0],
+            "after_published_at": walked[done_prefix - 1][1],
+        }
+
+    updated["last_checked_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    return updated
+
+def _skipped_entries(resume: Dict[str, Any]) -> List[Tuple[str, Optional[str], bool]]:
+    return [
+        (resume["top_video_id"], resume.get("top_published_at"), True),
+        (resume["after_video_id"], resume.get("after_published_at"), True),
+    ]
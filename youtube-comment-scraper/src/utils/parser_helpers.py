@@ -1,7 +1,8 @@
 import logging
 import re
-from typing import Dict, Optional
-from urllib.parse import parse_qs, urlparse
+from datetime import datetime, timezone
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import ParseResult, parse_qs, urlparse
 
 logger = logging.getLogger(__name__)
 
@@ -12,21 +13,71 @@ YOUTUBE_VIDEO_HOSTS = {
     "youtu.be",
 }
 
-def extract_video_id(url: str) -> Optional[str]:
+YOUTUBE_CHANNEL_HOSTS = {"www.youtube.com", "youtube.com", "m.youtube.com"}
+
+SHORTS_PATH_RE = re.compile(r"^/shorts/([^/?]+)")
+EMBED_PATH_RE = re.compile(r"^/embed/([^/?]+)")
+CHANNEL_PATH_RE = re.compile(r"^/channel/([^/]+)$")
+HANDLE_PATH_RE = re.compile(r"^/(@[^/]+)$")
+
+# Single-pass match for the URL shapes that make up almost all real input.
+# Anything it does not match exactly falls back to urlparse, so both paths
+# must agree on every URL this accepts. parse_qs keeps the first "v", so the
+# watch branch only skips parameters that are not "v" (and not
+# percent-encoded, which could decode to "v").
+FAST_URL_RE = re.compile(
+    r"^https?://(?:"
+    r"(?:www\.|m\.)?youtube\.com/(?:"
+    r"watch\?(?:(?!v=)[^#&%]*&)*v=(?P<watch>[A-Za-z0-9_-]+)(?:[&#]|$)"
+    r"|shorts/(?P<shorts>[A-Za-z0-9_-]+)(?:[/?#]|$)"
+    r"|embed/(?P<embed>[A-Za-z0-9_-]+)(?:[/?#]|$)"
+    r"|channel/(?P<channel>[A-Za-z0-9_-]+)/*(?:[?#]|$)"
+    r"|(?P<handle>@[A-Za-z0-9_.-]+)/*(?:[?#]|$)"
+    r")"
+    r"|youtu\.be/(?P<short>[A-Za-z0-9_-]+)(?:[?#]|$)"
+    r")"
+)
+
+class ClassifiedUrl(NamedTuple):
     """
-    Extracts a YouTube video ID from common URL variants.
+    A URL reduced to what the scraper needs: kind is "video", "channel_id"
+    or "handle", and id is the video ID, channel ID or "@handle".
     """
+
+    kind: str
+    id: str
+
+    @property
+    def key(self) -> str:
+        # Handles are case-insensitive; IDs are not.
+        value = self.id.lower() if self.kind == "handle" else self.id
+        return f"{self.kind}:{value}"
+
+    @property
+    def url(self) -> str:
+        """
+        Canonical URL for this item, accepted by the extractors.
+        """
+        if self.kind == "video":
+            return f"https://www.youtube.com/watch?v={self.id}"
+        if self.kind == "channel_id":
+            return f"https://www.youtube.com/channel/{self.id}"
+        return f"https://www.youtube.com/{self.id}"
+
+def _parse(url: str) -> Optional[ParseResult]:
     try:
-        parsed = urlparse(url)
+        return urlparse(url)
     except Exception as exc:  # noqa: BLE001
         logger.warning("Failed to parse URL %s: %s", url, exc)
         return None
 
-    if parsed.netloc not in YOUTUBE_VIDEO_HOSTS:
+def _video_id_from_parsed(parsed: ParseResult) -> Optional[str]:
+    host = parsed.netloc.lower()
+    if host not in YOUTUBE_VIDEO_HOSTS:
         return None
 
     # youtu.be/<id>
-    if parsed.netloc == "youtu.be":
+    if host == "youtu.be":
         vid = parsed.path.lstrip("/")
         return vid or None
 
@@ -37,41 +88,30 @@ def extract_video_id(url: str) -> Optional[str]:
         return vid
 
     # /shorts/<id>
-    shorts_match = re.match(r"^/shorts/([^/?]+)", parsed.path)
+    shorts_match = SHORTS_PATH_RE.match(parsed.path)
     if shorts_match:
         return shorts_match.group(1)
 
     # Embed format: /embed/<id>
-    embed_match = re.match(r"^/embed/([^/?]+)", parsed.path)
+    embed_match = EMBED_PATH_RE.match(parsed.path)
     if embed_match:
         return embed_match.group(1)
 
     return None
 
-def extract_channel_identifier(url: str) -> Optional[Dict[str, str]]:
-    """
-    Tries to determine a channel identifier from URL and returns either:
-      {"type": "channel_id", "value": "<id>"} or
-      {"type": "handle", "value": "@handle"}
-    """
-    try:
-        parsed = urlparse(url)
-    except Exception as exc:  # noqa: BLE001
-        logger.warning("Failed to parse URL %s: %s", url, exc)
-        return None
-
-    if parsed.netloc not in {"www.youtube.com", "youtube.com", "m.youtube.com"}:
+def _channel_identifier_from_parsed(parsed: ParseResult) -> Optional[Dict[str, str]]:
+    if parsed.netloc.lower() not in YOUTUBE_CHANNEL_HOSTS:
         return None
 
     path = parsed.path.rstrip("/")
 
     # /channel/<id>
-    channel_match = re.match(r"^/channel/([^/]+)$", path)
+    channel_match = CHANNEL_PATH_RE.match(path)
     if channel_match:
         return {"type": "channel_id", "value": channel_match.group(1)}
 
     # /@handle
-    handle_match = re.match(r"^/(@[^/]+)$", path)
+    handle_match = HANDLE_PATH_RE.match(path)
     if handle_match:
         return {"type": "handle", "value": handle_match.group(1)}
 
@@ -80,8 +120,72 @@ def extract_channel_identifier(url: str) -> Optional[Dict[str, str]]:
     # Here we return None to keep logic explicit.
     return None
 
+def extract_video_id(url: str) -> Optional[str]:
+    """
+    Extracts a YouTube video ID from common URL variants.
+    """
+    parsed = _parse(url)
+    return _video_id_from_parsed(parsed) if parsed else None
+
+def extract_channel_identifier(url: str) -> Optional[Dict[str, str]]:
+    """
+    Tries to determine a channel identifier from URL and returns either:
+      {"type": "channel_id", "value": "<id>"} or
+      {"type": "handle", "value": "@handle"}
+    """
+    parsed = _parse(url)
+    return _channel_identifier_from_parsed(parsed) if parsed else None
+
+def classify_url(url: str) -> Optional[ClassifiedUrl]:
+    """
+    Parses a URL once and classifies it as a channel or a video. Channel
+    URLs win, matching the order main.py has always checked them in. URLs
+    without a scheme (e.g. "youtu.be/<id>") are accepted.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+
+    fast = FAST_URL_RE.match(url)
+    if fast:
+        group = fast.lastgroup
+        if group == "channel":
+            return ClassifiedUrl("channel_id", fast.group(group))
+        if group == "handle":
+            return ClassifiedUrl("handle", fast.group(group))
+        return ClassifiedUrl("video", fast.group(group))
+
+    parsed = _parse(url)
+    if parsed is None:
+        return None
+
+    channel = _channel_identifier_from_parsed(parsed)
+    if channel:
+        return ClassifiedUrl(channel["type"], channel["value"])
+
+    video_id = _video_id_from_parsed(parsed)
+    if video_id:
+        return ClassifiedUrl("video", video_id)
+    return None
+
 def is_video_url(url: str) -> bool:
     return extract_video_id(url) is not None
 
 def is_channel_url(url: str) -> bool:
-    return extract_channel_identifier(url) is not None
\ No newline at end of file
+    return extract_channel_identifier(url) is not None
+
+def parse_iso8601_datetime(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses an ISO 8601 date or timestamp (e.g. '2025-01-23' or
+    '2025-01-23T08:30:00Z') into an aware UTC datetime.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        logger.warning("Invalid ISO 8601 date: %s", value)
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
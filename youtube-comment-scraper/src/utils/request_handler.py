@@ -5,6 +5,8 @@ from typing import Any, Dict, Iterable, Optional, Tuple
 
 import requests
 
+from utils.profiler import profile_stage
+
 logger = logging.getLogger(__name__)
 
 class RequestHandler:
@@ -44,7 +46,8 @@ class RequestHandler:
             attempt += 1
             try:
                 logger.debug("GET %s params=%s (attempt %s)", url, params, attempt)
-                resp = self.session.get(url, params=params, timeout=self.timeout)
+                with profile_stage("RequestHandler.get_json.request"):
+                    resp = self.session.get(url, params=params, timeout=self.timeout)
                 status = resp.status_code
 
                 if status not in expected_set:
@@ -60,12 +63,14 @@ class RequestHandler:
                         self._sleep_backoff(attempt)
                         continue
                     try:
-                        return resp.json()
+                        with profile_stage("RequestHandler.get_json.decode"):
+                            return resp.json()
                     except json.JSONDecodeError:
                         return None
 
                 try:
-                    return resp.json()
+                    with profile_stage("RequestHandler.get_json.decode"):
+                        return resp.json()
                 except json.JSONDecodeError:
                     logger.error("Failed to parse JSON from %s", resp.url)
                     return None
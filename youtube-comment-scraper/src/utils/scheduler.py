@@ -0,0 +1,183 @@
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.parser_helpers import parse_iso8601_datetime
+
+logger = logging.getLogger(__name__)
+
+# commentThreads returns at most 100 threads per page, one quota unit each.
+COMMENTS_PER_PAGE = 100
+
+# A policy maps (video details, sampled comment count) to a score; videos
+# with higher scores are scraped first.
+PriorityPolicy = Callable[[Dict[str, Any], int], float]
+
+PRIORITY_POLICIES: Dict[str, PriorityPolicy] = {}
+
+def register_policy(name: str) -> Callable[[PriorityPolicy], PriorityPolicy]:
+    """
+    Decorator that makes a priority policy selectable via `scheduler.policy`.
+    """
+    def decorator(func: PriorityPolicy) -> PriorityPolicy:
+        PRIORITY_POLICIES[name] = func
+        return func
+    return decorator
+
+def _age_days(video: Dict[str, Any]) -> Optional[float]:
+    published = parse_iso8601_datetime(video.get("video_date"))
+    if published is None:
+        return None
+    age = datetime.now(timezone.utc) - published
+    return max(age.total_seconds() / 86400.0, 1.0 / 24)
+
+@register_policy("playlist")
+def playlist_order(video: Dict[str, Any], sampled: int) -> float:
+    # Every video scores the same; the stable sort keeps playlist order.
+    return 0.0
+
+@register_policy("newest")
+def newest_first(video: Dict[str, Any], sampled: int) -> float:
+    published = parse_iso8601_datetime(video.get("video_date"))
+    return published.timestamp() if published else 0.0
+
+@register_policy("most_active")
+def most_active(video: Dict[str, Any], sampled: int) -> float:
+    age_days = _age_days(video)
+    comments = video.get("video_comments") or 0
+    return comments / age_days if age_days else float(comments)
+
+@register_policy("most_under_sampled")
+def most_under_sampled(video: Dict[str, Any], sampled: int) -> float:
+    comments = video.get("video_comments") or 0
+    missing = max(comments - sampled, 0)
+    # Fraction of the thread we have never seen, with the absolute gap as a
+    # tie-breaker so large unsampled videos beat tiny ones.
+    return missing / (comments + 1) + missing * 1e-9
+
+class VideoScheduler:
+    """
+    Orders and trims the run's videos so the most valuable ones are scraped
+    before the run's quota or time budget runs out.
+
+    The budget is shared by every input of the run. Lookups already made
+    (channels.list, playlistItems pages, videos.list) are deducted through
+    charge(); each planned video is deducted up front at one quota unit per
+    commentThreads page needed for `comment_limit`, plus wall-clock time for
+    those pages and the transcript fetch.
+
+    plan() ranks only the videos it is given, i.e. one channel's uploads or
+    one video URL, since inputs are streamed rather than collected up front.
+    The budget is therefore spent in input order across channels.
+    """
+
+    def __init__(
+        self,
+        settings: Dict[str, Any],
+        sampled_counts: Optional[Callable[[List[str]], Dict[str, int]]] = None,
+    ) -> None:
+        config = settings.get("scheduler") or {}
+        policy_name = config.get("policy", "playlist")
+        if policy_name not in PRIORITY_POLICIES:
+            raise ValueError(
+                f"Unknown scheduler policy '{policy_name}'. "
+                f"Available: {', '.join(sorted(PRIORITY_POLICIES))}"
+            )
+
+        self.policy_name = policy_name
+        self.policy = PRIORITY_POLICIES[policy_name]
+        self.comment_limit = int(settings.get("comment_limit", 100))
+        self.fetch_captions = bool(settings.get("fetch_captions", True))
+        self.seconds_per_request = float(config.get("seconds_per_request", 0.5))
+        self.transcript_seconds = float(config.get("transcript_seconds", 2.0))
+        self.sampled_counts = sampled_counts
+
+        quota_budget = config.get("quota_budget")
+        self.quota_remaining: Optional[float] = (
+            float(quota_budget) if quota_budget is not None else None
+        )
+        time_budget = config.get("time_budget_seconds")
+        self.deadline: Optional[float] = (
+            time.monotonic() + float(time_budget) if time_budget is not None else None
+        )
+
+    def estimate_cost(self, video: Dict[str, Any]) -> Dict[str, float]:
+        expected_comments = min(self.comment_limit, video.get("video_comments") or 0)
+        # The first commentThreads page is requested even for empty threads.
+        pages = max(1, math.ceil(expected_comments / COMMENTS_PER_PAGE))
+        seconds = pages * self.seconds_per_request
+        if self.fetch_captions:
+            seconds += self.transcript_seconds
+        return {"quota_units": float(pages), "seconds": seconds}
+
+    @property
+    def exhausted(self) -> bool:
+        if self.quota_remaining is not None and self.quota_remaining <= 0:
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def can_afford(self, quota_units: float) -> bool:
+        """
+        True if the budget is not exhausted and still covers `quota_units`.
+        """
+        if self.exhausted:
+            return False
+        return self.quota_remaining is None or self.quota_remaining >= quota_units
+
+    def charge(self, quota_units: float) -> None:
+        """
+        Records quota spent outside plan(), e.g. on discovery requests.
+        """
+        if self.quota_remaining is not None:
+            self.quota_remaining -= quota_units
+
+    def plan(
+        self,
+        videos: List[Dict[str, Any]],
+        extra_quota_per_video: float = 0.0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the videos to scrape in priority order, dropping those whose
+        estimated cost no longer fits in the remaining budget. The cost of
+        every selected video, plus `extra_quota_per_video` for lookups made
+        only once it is selected, is deducted from the budget.
+        """
+        sampled: Dict[str, int] = {}
+        if self.sampled_counts is not None and videos:
+            sampled = self.sampled_counts([v["video_id"] for v in videos])
+
+        ranked = sorted(
+            videos,
+            key=lambda v: self.policy(v, sampled.get(v["video_id"], 0)),
+            reverse=True,
+        )
+
+        time_remaining: Optional[float] = None
+        if self.deadline is not None:
+            time_remaining = self.deadline - time.monotonic()
+
+        selected: List[Dict[str, Any]] = []
+        for video in ranked:
+            cost = self.estimate_cost(video)
+            cost["quota_units"] += extra_quota_per_video
+            if self.quota_remaining is not None and cost["quota_units"] > self.quota_remaining:
+                continue
+            if time_remaining is not None and cost["seconds"] > time_remaining:
+                continue
+
+            if self.quota_remaining is not None:
+                self.quota_remaining -= cost["quota_units"]
+            if time_remaining is not None:
+                time_remaining -= cost["seconds"]
+            selected.append(video)
+
+        if len(selected) < len(videos):
+            logger.info(
+                "Scheduler (%s) selected %s of %s videos within budget",
+                self.policy_name,
+                len(selected),
+                len(videos),
+            )
+        return selected
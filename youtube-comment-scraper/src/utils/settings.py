@@ -0,0 +1,21 @@
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+def load_settings() -> Dict[str, Any]:
+    settings_path = PROJECT_ROOT / "src" / "config" / "settings.json"
+    if not settings_path.exists():
+        raise FileNotFoundError(f"settings.json not found at {settings_path}")
+
+    with settings_path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    return data
+
+def resolve_project_path(path: str) -> Path:
+    resolved = Path(path)
+    if not resolved.is_absolute():
+        resolved = PROJECT_ROOT / resolved
+    return resolved
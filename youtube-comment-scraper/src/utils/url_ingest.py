@@ -0,0 +1,120 @@
+import glob
+import logging
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Set, Tuple
+
+from utils.parser_helpers import ClassifiedUrl, classify_url
+
+logger = logging.getLogger(__name__)
+
+# Invalid lines beyond this many are only counted, not logged one by one.
+MAX_LOGGED_INVALID_LINES = 20
+
+class BoundedSeenSet:
+    """
+    Remembers recently seen keys using at most `max_items` entries.
+
+    Keys are kept in two generations; when the current one fills up it
+    replaces the previous one. Duplicates are caught exactly as long as fewer
+    than max_items / 2 distinct keys separate them, which covers the usual
+    case of repeated or overlapping exports without holding every key of a
+    multi-million line input in memory.
+    """
+
+    def __init__(self, max_items: int = 2_000_000) -> None:
+        self.generation_size = max(1, max_items // 2)
+        self._current: Set[str] = set()
+        self._previous: Set[str] = set()
+
+    def add(self, key: str) -> bool:
+        """
+        Returns True if key was not seen recently, and records it.
+        """
+        if key in self._current or key in self._previous:
+            return False
+        self._current.add(key)
+        if len(self._current) >= self.generation_size:
+            self._previous = self._current
+            self._current = set()
+        return True
+
+class IngestStats:
+    def __init__(self) -> None:
+        self.lines = 0
+        self.skipped = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.lines} lines: {self.accepted} accepted, {self.duplicates} duplicates, "
+            f"{self.invalid} invalid, {self.skipped} blank/comment"
+        )
+
+def iter_input_lines(sources: Iterable[str]) -> Iterator[Tuple[str, int, str]]:
+    """
+    Yields (source, line_number, line) from each source in turn. A source is
+    "-" for stdin, a file path, or a glob pattern. Files are streamed, never
+    read whole.
+    """
+    for source in sources:
+        if source == "-":
+            for lineno, line in enumerate(sys.stdin, start=1):
+                yield "<stdin>", lineno, line
+            continue
+
+        paths = sorted(glob.glob(source)) if glob.has_magic(source) else [source]
+        if not paths:
+            logger.warning("No input files match %s", source)
+
+        for path in paths:
+            if not Path(path).is_file():
+                logger.warning("Input file not found: %s", path)
+                continue
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for lineno, line in enumerate(f, start=1):
+                    yield path, lineno, line
+
+def ingest_urls(
+    sources: Iterable[str],
+    *,
+    max_tracked: int = 2_000_000,
+    stats: Optional[IngestStats] = None,
+) -> Iterator[ClassifiedUrl]:
+    """
+    Streams URLs from `sources`, skipping blank and "#" lines, classifies each
+    one once and yields unique ClassifiedUrl items. Invalid lines are logged
+    (up to MAX_LOGGED_INVALID_LINES) and counted in `stats`.
+    """
+    if stats is None:
+        stats = IngestStats()
+    seen = BoundedSeenSet(max_tracked)
+
+    for source, lineno, line in iter_input_lines(sources):
+        stats.lines += 1
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            stats.skipped += 1
+            continue
+
+        item = classify_url(stripped)
+        if item is None:
+            stats.invalid += 1
+            if stats.invalid <= MAX_LOGGED_INVALID_LINES:
+                logger.warning("Unrecognized URL at %s:%s: %s", source, lineno, stripped[:200])
+            continue
+
+        if not seen.add(item.key):
+            stats.duplicates += 1
+            continue
+
+        stats.accepted += 1
+        yield item
+
+    if stats.invalid > MAX_LOGGED_INVALID_LINES:
+        logger.warning(
+            "%s more invalid lines not shown", stats.invalid - MAX_LOGGED_INVALID_LINES
+        )
+    logger.info("Input: %s", stats)
@@ -0,0 +1,494 @@
+import heapq
+import itertools
+import logging
+import math
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from extractors.channel_extractor import (
+    discover_channel_uploads,
+    get_channel_details_by_id,
+    get_channel_details_from_url,
+)
+from extractors.comment_extractor import get_video_comments
+from extractors.video_extractor import get_video_details, get_video_details_batch
+from main import (
+    build_record,
+    open_record_sinks,
+    parse_args,
+    resolve_input_sources,
+    setup_logging,
+    write_profile_reports,
+)
+from storage.jsonl_storage import JsonLinesStorage
+from storage.sqlite_storage import SqliteStorage
+from utils.channel_state import advance_bookmark, load_channel_state, save_channel_state
+from utils.parser_helpers import parse_iso8601_datetime
+from utils.profiler import mark_video_boundary, profile_stage, start_profiling
+from utils.request_handler import RequestHandler
+from utils.settings import load_settings, resolve_project_path
+from utils.url_ingest import IngestStats, ingest_urls
+
+logger = logging.getLogger("watch")
+
+# How many of a video's most recent comment IDs are remembered to find where
+# the previous poll stopped, and how many of those survive a restart.
+KNOWN_IDS_PER_VIDEO = 200
+KNOWN_IDS_SAVED = 50
+
+# Minimum delay between writes of the channel and watch state files.
+STATE_SAVE_SECONDS = 60
+
+class WatchedVideo:
+    """
+    Polling state for one video: the newest comment IDs already written and
+    the number of new comments found by the last few polls.
+    """
+
+    def __init__(
+        self,
+        video: Dict[str, Any],
+        channel: Dict[str, Any],
+        interval: float,
+        velocity_window: int,
+    ) -> None:
+        self.video = video
+        self.channel = channel
+        self.interval = interval
+        self.history: Deque[Tuple[float, int]] = deque(maxlen=max(2, velocity_window))
+        # Consecutive empty polls made at the maximum interval.
+        self.idle_polls = 0
+        self._known_order: Deque[str] = deque()
+        self.known_ids: Set[str] = set()
+
+    @property
+    def video_id(self) -> str:
+        return self.video["video_id"]
+
+    def remember(self, comments: List[Dict[str, Any]]) -> None:
+        # Comments arrive newest first; store them oldest first so the
+        # oldest IDs are the ones evicted.
+        self.remember_ids(c.get("comment_id") for c in reversed(comments))
+
+    def remember_ids(self, comment_ids: Iterable[Optional[str]]) -> None:
+        """
+        Adds comment IDs given oldest first.
+        """
+        for cid in comment_ids:
+            if not cid or cid in self.known_ids:
+                continue
+            self._known_order.append(cid)
+            self.known_ids.add(cid)
+            if len(self._known_order) > KNOWN_IDS_PER_VIDEO:
+                self.known_ids.discard(self._known_order.popleft())
+
+    def newest_known_ids(self, limit: int) -> List[str]:
+        # Oldest first, like remember_ids() expects.
+        return list(self._known_order)[-limit:]
+
+    def record_poll(self, now: float, new_comments: int) -> None:
+        self.history.append((now, new_comments))
+
+    def comments_per_second(self) -> Optional[float]:
+        """
+        New-comment rate over the polls in the velocity window, or None until
+        there are two polls to measure between.
+        """
+        if len(self.history) < 2:
+            return None
+        elapsed = self.history[-1][0] - self.history[0][0]
+        if elapsed <= 0:
+            return None
+        # The first poll's comments arrived before the window started.
+        new_comments = sum(n for _, n in itertools.islice(self.history, 1, None))
+        return new_comments / elapsed
+
+class CommentWatcher:
+    """
+    Long-running poller that keeps a priority queue of videos keyed by their
+    next poll time. Busy videos are polled often, and the interval of videos
+    that stop receiving comments grows exponentially up to a ceiling. Only
+    comments not seen before are written to the sinks. Videos that stay
+    silent at the maximum interval for `retire_after_empty_polls` polls, or
+    that are older than `max_video_age_days`, are retired so quota use does
+    not keep growing with every upload the channels publish.
+
+    What has been seen survives restarts: channel bookmarks are kept in
+    `channel_state_file` (shared with main.py's incremental refresh), and the
+    watched videos with their newest comment IDs in `watch_state_file`. When
+    the SQLite sink is enabled, known IDs are also read back from it.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        request_handler: RequestHandler,
+        settings: Dict[str, Any],
+        sinks: List[Any],
+        channel_state_path: Optional[Path] = None,
+        watch_state_path: Optional[Path] = None,
+    ) -> None:
+        config = settings.get("watch") or {}
+        self.api_key = api_key
+        self.request_handler = request_handler
+        self.sinks = sinks
+        self.comment_limit = int(settings.get("comment_limit", 100))
+        self.max_videos_per_channel = int(settings.get("max_videos_per_channel", 30))
+
+        self.min_interval = float(config.get("min_interval_seconds", 60))
+        self.max_interval = float(config.get("max_interval_seconds", 6 * 3600))
+        self.initial_interval = float(config.get("initial_interval_seconds", 300))
+        self.target_per_poll = float(config.get("target_new_comments_per_poll", 20))
+        self.cooldown_factor = float(config.get("cooldown_factor", 2.0))
+        self.velocity_window = int(config.get("velocity_window", 5))
+        self.channel_refresh = float(config.get("channel_refresh_seconds", 3600))
+        self.retire_after = int(config.get("retire_after_empty_polls", 3))
+        max_age_days = config.get("max_video_age_days")
+        self.max_age_seconds: Optional[float] = (
+            float(max_age_days) * 86400 if max_age_days is not None else None
+        )
+
+        self.storage = next((s for s in sinks if isinstance(s, SqliteStorage)), None)
+        self.channel_state_path = channel_state_path
+        self.watch_state_path = watch_state_path
+        self.channel_state = load_channel_state(channel_state_path) if channel_state_path else {}
+        self.watch_state = load_channel_state(watch_state_path) if watch_state_path else {}
+        self._state_saved_at = time.monotonic()
+
+        self.videos: Dict[str, WatchedVideo] = {}
+        self.channels: Dict[str, Dict[str, Any]] = {}
+        self._restored_channels: Set[str] = set()
+        self._queue: List[Tuple[float, int, str, str]] = []
+        self._seq = itertools.count()
+
+        self.polls = 0
+        self.quota_units = 0
+        self.comments_written = 0
+        self.retired = 0
+
+    def _schedule(self, due: float, kind: str, key: str) -> None:
+        heapq.heappush(self._queue, (due, next(self._seq), kind, key))
+
+    def add_video(self, video: Dict[str, Any], channel: Dict[str, Any]) -> None:
+        if video["video_id"] in self.videos:
+            return
+        if self._too_old(video):
+            logger.debug("Not watching %s: older than max_video_age_days", video["video_id"])
+            self.watch_state.pop(video["video_id"], None)
+            return
+        watched = WatchedVideo(video, channel, self.initial_interval, self.velocity_window)
+        watched.remember_ids((self.watch_state.get(watched.video_id) or {}).get("known_ids", []))
+        if self.storage is not None:
+            # The details were just fetched; polls only ever upsert comments,
+            # so this is the one point where the video and channel rows are
+            # refreshed.
+            self.storage.write_records([build_record(channel, video, None, None)])
+            archived = self.storage.latest_comments_for_video(watched.video_id, KNOWN_IDS_SAVED)
+            watched.remember_ids(row["comment_id"] for row in reversed(archived))
+        self.videos[watched.video_id] = watched
+        self._schedule(time.monotonic(), "video", watched.video_id)
+
+    def add_channel(self, channel: Dict[str, Any]) -> None:
+        channel_id = channel["channel_id"]
+        if channel_id in self.channels:
+            return
+        self.channels[channel_id] = channel
+        self._schedule(time.monotonic(), "channel", channel_id)
+
+    def next_interval(self, watched: WatchedVideo, new_comments: int) -> float:
+        """
+        Picks the delay before the next poll so that it should find about
+        `target_new_comments_per_poll` new comments.
+        """
+        if new_comments >= self.comment_limit:
+            # The poll never reached a known comment, so we are falling behind.
+            interval = self.min_interval
+        elif new_comments == 0:
+            interval = watched.interval * self.cooldown_factor
+        else:
+            rate = watched.comments_per_second()
+            interval = self.target_per_poll / rate if rate else watched.interval
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _too_old(self, video: Dict[str, Any]) -> bool:
+        if self.max_age_seconds is None:
+            return False
+        published = parse_iso8601_datetime(video.get("video_date"))
+        if published is None:
+            return False
+        age = datetime.now(timezone.utc) - published
+        return age.total_seconds() > self.max_age_seconds
+
+    def retire_video(self, video_id: str, reason: str) -> None:
+        """
+        Stops watching a video and forgets its saved state. Its entries left
+        in the queue are dropped when they come up.
+        """
+        self.videos.pop(video_id, None)
+        self.watch_state.pop(video_id, None)
+        self.retired += 1
+        logger.info(f"Stopped watching {video_id}: {reason}")
+
+    def poll_video(self, video_id: str) -> int:
+        watched = self.videos[video_id]
+        if self._too_old(watched.video):
+            self.retire_video(video_id, "older than max_video_age_days")
+            return 0
+        baseline = not watched.history
+
+        with profile_stage("get_video_comments"):
+            comments = get_video_comments(
+                api_key=self.api_key,
+                video_id=video_id,
+                max_comments=self.comment_limit,
+                request_handler=self.request_handler,
+                order="time",
+                stop_at_comment_ids=watched.known_ids,
+            )
+        now = time.monotonic()
+        self.polls += 1
+        self.quota_units += max(1, math.ceil(len(comments) / 100))
+
+        if comments:
+            with profile_stage("build_record"):
+                records = [build_record(watched.channel, watched.video, c, None) for c in comments]
+            with profile_stage("record_sinks"):
+                for sink in self.sinks:
+                    if sink is self.storage:
+                        # The cached video and channel details are stale by
+                        # now; don't let them overwrite fresher rows.
+                        sink.write_records(records, comments_only=True)
+                    else:
+                        sink.write_records(records)
+            self.comments_written += len(records)
+            watched.remember(comments)
+
+        # The first poll backfills the newest comments; it says nothing about
+        # how fast new ones arrive, so it only anchors the velocity window.
+        watched.record_poll(now, 0 if baseline else len(comments))
+        if not baseline:
+            watched.interval = self.next_interval(watched, len(comments))
+
+        if comments or watched.interval < self.max_interval:
+            watched.idle_polls = 0
+        elif not baseline:
+            watched.idle_polls += 1
+        if self.retire_after > 0 and watched.idle_polls >= self.retire_after:
+            self.retire_video(
+                video_id, f"no new comments in {watched.idle_polls} polls at the maximum interval"
+            )
+            return len(comments)
+
+        self._schedule(now + watched.interval, "video", video_id)
+        mark_video_boundary(video_id)
+        logger.debug(
+            "Polled %s: %s new comments, next poll in %.0fs",
+            video_id,
+            len(comments),
+            watched.interval,
+        )
+        return len(comments)
+
+    def refresh_channel(self, channel_id: str) -> None:
+        channel = self.channels[channel_id]
+        bookmark = self.channel_state.get(channel_id) or {}
+        discovery = discover_channel_uploads(
+            api_key=self.api_key,
+            channel_id=channel_id,
+            request_handler=self.request_handler,
+            max_videos=self.max_videos_per_channel,
+            uploads_playlist_id=channel.get("uploads_playlist_id"),
+            known_video_id=bookmark.get("newest_video_id"),
+            known_published_at=bookmark.get("newest_published_at"),
+            resume=bookmark.get("resume"),
+        )
+        self.quota_units += discovery["pages"]
+
+        upload_ids = [u["video_id"] for u in discovery["uploads"]]
+        restored_ids: List[str] = []
+        if channel_id not in self._restored_channels:
+            # Videos of this channel watched before a restart are not
+            # rediscovered past the bookmark, so pick them up from the state.
+            self._restored_channels.add(channel_id)
+            restored_ids = [
+                vid
+                for vid, entry in self.watch_state.items()
+                if entry.get("channel_id") == channel_id and vid not in upload_ids
+            ]
+
+        failed_ids: Set[str] = set()
+        if upload_ids or restored_ids:
+            details = get_video_details_batch(
+                self.api_key, upload_ids + restored_ids, self.request_handler, failed_ids=failed_ids
+            )
+            self.quota_units += math.ceil(len(upload_ids + restored_ids) / 50)
+            for vid in upload_ids + restored_ids:
+                if vid in details:
+                    self.add_video(details[vid], channel)
+        if failed_ids.intersection(restored_ids):
+            self._restored_channels.discard(channel_id)
+        if discovery["uploads"] and bookmark:
+            logger.info(f"Channel {channel_id}: watching {len(discovery['uploads'])} new uploads")
+
+        # Uploads whose details request failed are rediscovered next refresh.
+        self.channel_state[channel_id] = advance_bookmark(bookmark, discovery, failed_ids)
+        self._schedule(time.monotonic() + self.channel_refresh, "channel", channel_id)
+
+    def run(self, max_runtime: Optional[float] = None) -> None:
+        deadline = time.monotonic() + max_runtime if max_runtime is not None else None
+        last_report = time.monotonic()
+
+        while self._queue:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+
+            due, _, kind, key = self._queue[0]
+            if due > now:
+                wait = due - now
+                if deadline is not None:
+                    wait = min(wait, deadline - now)
+                time.sleep(wait)
+                continue
+
+            heapq.heappop(self._queue)
+            if kind == "video" and key not in self.videos:
+                continue
+            try:
+                if kind == "channel":
+                    self.refresh_channel(key)
+                else:
+                    self.poll_video(key)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception(f"Failed to poll {kind} {key}: {exc}")
+                retry = self.videos[key].interval if kind == "video" else self.channel_refresh
+                self._schedule(time.monotonic() + retry, kind, key)
+
+            if time.monotonic() - self._state_saved_at >= STATE_SAVE_SECONDS:
+                self.save_state()
+            if time.monotonic() - last_report >= 600:
+                self.log_summary()
+                last_report = time.monotonic()
+
+        self.log_summary()
+
+    def save_state(self) -> None:
+        """
+        Writes channel bookmarks and each watched video's newest comment IDs.
+        Sinks are flushed first so the state never runs ahead of the output.
+        """
+        for sink in self.sinks:
+            if hasattr(sink, "flush"):
+                sink.flush()
+
+        # Saved videos not watched now are kept only until their channel's
+        # first refresh has had the chance to restore them.
+        self.watch_state = {
+            vid: entry
+            for vid, entry in self.watch_state.items()
+            if entry.get("channel_id") in self.channels
+            and entry.get("channel_id") not in self._restored_channels
+        }
+        for watched in self.videos.values():
+            self.watch_state[watched.video_id] = {
+                "channel_id": watched.video.get("channel_id"),
+                "known_ids": watched.newest_known_ids(KNOWN_IDS_SAVED),
+            }
+        if self.channel_state_path is not None:
+            save_channel_state(self.channel_state_path, self.channel_state)
+        if self.watch_state_path is not None:
+            save_channel_state(self.watch_state_path, self.watch_state)
+        self._state_saved_at = time.monotonic()
+
+    def log_summary(self) -> None:
+        hot = sorted(self.videos.values(), key=lambda w: w.interval)[:5]
+        logger.info(
+            "Watching %s videos (%s retired): %s polls, ~%s quota units, %s new comments. "
+            "Hottest: %s",
+            len(self.videos),
+            self.retired,
+            self.polls,
+            self.quota_units,
+            self.comments_written,
+            ", ".join(f"{w.video_id} ({w.interval:.0f}s)" for w in hot) or "-",
+        )
+
+def main() -> None:
+    args = parse_args()
+    settings = load_settings()
+    setup_logging(settings.get("log_level", "INFO"))
+
+    api_key = settings.get("youtube_api_key", "").strip()
+    if not api_key or api_key == "YOUR_API_KEY_HERE":
+        logger.error(
+            "You must set a valid 'youtube_api_key' in src/config/settings.json."
+        )
+        sys.exit(1)
+
+    request_handler = RequestHandler()
+    sinks = open_record_sinks(settings)
+    if not sinks:
+        # The JSON array output cannot be appended to; fall back to JSON Lines.
+        jsonl_path = resolve_project_path(settings.get("jsonl_file", "data/comments.jsonl"))
+        logger.info(f"No streaming storage backend enabled; appending to {jsonl_path}")
+        sinks.append(JsonLinesStorage(jsonl_path))
+
+    watcher = CommentWatcher(
+        api_key,
+        request_handler,
+        settings,
+        sinks,
+        channel_state_path=resolve_project_path(
+            settings.get("channel_state_file", "data/channel_state.json")
+        ),
+        watch_state_path=resolve_project_path(
+            settings.get("watch_state_file", "data/watch_state.json")
+        ),
+    )
+    sources = resolve_input_sources(settings, args.inputs)
+    ingest_stats = IngestStats()
+
+    for item in ingest_urls(sources, stats=ingest_stats):
+        try:
+            if item.kind == "video":
+                video = get_video_details(api_key, item.id, request_handler)
+                channel = (
+                    get_channel_details_by_id(api_key, video["channel_id"], request_handler)
+                    if video and video.get("channel_id")
+                    else None
+                )
+                if video and channel:
+                    watcher.add_video(video, channel)
+            else:
+                channel = get_channel_details_from_url(api_key, item.url, request_handler)
+                if channel:
+                    watcher.add_channel(channel)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception(f"Failed to add URL {item.url}: {exc}")
+
+    if not ingest_stats.accepted:
+        logger.error(f"No valid input URLs found in {', '.join(sources)}. Nothing to do.")
+        for sink in sinks:
+            sink.close()
+        sys.exit(1)
+
+    max_runtime = (settings.get("watch") or {}).get("max_runtime_seconds")
+    if args.profile:
+        start_profiling()
+    try:
+        watcher.run(float(max_runtime) if max_runtime is not None else None)
+    except KeyboardInterrupt:
+        logger.info("Interrupted; stopping watch.")
+        watcher.log_summary()
+    finally:
+        watcher.save_state()
+        for sink in sinks:
+            sink.close()
+        write_profile_reports(settings)
+
+if __name__ == "__main__":
+    main()